@@ -139,6 +139,30 @@ static PyObject* crypto_sha256(PyObject *, PyObject* args) {
 
 
 
+static PyObject* crypto_sha256d64(PyObject *, PyObject* args) {
+    Py_buffer buffer;
+    if (!PyArg_ParseTuple(args,"y*", &buffer)) return NULL;
+    if (buffer.len == 0 || buffer.len % 64 != 0) {
+        PyBuffer_Release(&buffer);
+        PyErr_SetString(PyExc_ValueError, "length must be a non zero multiple of 64 bytes");
+        return NULL;
+    }
+    size_t blocks = buffer.len / 64;
+    PyObject *return_value = PyBytes_FromStringAndSize(NULL, blocks * CSHA256::OUTPUT_SIZE);
+    if (return_value == NULL) {
+        PyBuffer_Release(&buffer);
+        return NULL;
+    }
+    // Batched double SHA256 of 64 byte blocks; uses the 8way AVX2 /
+    // 4way SSE4.1 / 2way SHA-NI transform selected by SHA256AutoDetect.
+    SHA256D64((unsigned char*)PyBytes_AS_STRING(return_value),
+              (const unsigned char*)buffer.buf, blocks);
+    PyBuffer_Release(&buffer);
+    return return_value;
+}
+
+
+
 static PyMethodDef module_methods[] = {
     { "__map_into_range__", (PyCFunction)crypto_map_into_range, METH_VARARGS, nullptr },
     { "__siphash__", (PyCFunction)crypto_siphash, METH_VARARGS, nullptr },
@@ -146,6 +170,7 @@ static PyMethodDef module_methods[] = {
     { "__decode_base58__", (PyCFunction)crypto_decode_base58, METH_VARARGS, nullptr },
     { "__encode_base58__", (PyCFunction)crypto_encode_base58, METH_VARARGS, nullptr },
     { "__double_sha256__", (PyCFunction)crypto_double_sha256, METH_VARARGS, nullptr },
+    { "__sha256d64__", (PyCFunction)crypto_sha256d64, METH_VARARGS, nullptr },
     { "__sha256__", (PyCFunction)crypto_sha256, METH_VARARGS, nullptr },
     { nullptr, nullptr, 0, nullptr }
 };
@@ -164,6 +189,9 @@ static PyModuleDef _module_crypto = {
 
 PyMODINIT_FUNC PyInit__crypto(void) {
     PyObject *m;
+    // Select the best available SHA256 implementation (SSE4/AVX2/SHA-NI)
+    // for this CPU; falls back to the portable code path.
+    SHA256AutoDetect();
     m = PyModule_Create(&_module_crypto);
     return m;
 }
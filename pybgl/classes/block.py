@@ -1,12 +1,15 @@
-from struct import unpack, pack
+from struct import unpack, pack, Struct
 from io import BytesIO
 from pybgl.functions.block import bits_to_target, target_to_difficulty, merkle_root_double_sha256
 from pybgl.functions.block import merkle_root, merkle_branches, merkle_root_from_branches
-from pybgl.functions.hash import sha3_256, double_sha256
+from pybgl.functions.hash import sha3_256, sha256, double_sha256
+from pybgl.crypto import __sha3_256__, __double_sha256__
 from pybgl.functions.tools import var_int_to_int, read_var_int, var_int_len, rh2s, reverse_hash, s2rh, s2rh_step4
 from pybgl.functions.tools import bytes_from_hex, int_to_var_int
 from pybgl.classes.transaction import Transaction
-import math
+from cache_strategies import LRU
+
+BLOCK_HEADER = Struct("<L32s32sL4sL")
 
 class Block(dict):
     """
@@ -22,6 +25,8 @@ class Block(dict):
     :param keep_raw_tx: (optional) boolean, by default is False.
 
     """
+    __slots__ = ()
+
     def __init__(self, raw_block=None, format="decoded", version=536870912, testnet=False, keep_raw_tx=False):
         if format not in ("decoded", "raw"):
             raise ValueError("block_format error, raw or decoded allowed")
@@ -50,30 +55,30 @@ class Block(dict):
         self["size"] = len(raw_block) if isinstance(raw_block, bytes) else int(len(raw_block)/2)
         s = self.get_stream(raw_block)
         self["format"] = "raw"
-        self["version"] = unpack("<L", s.read(4))[0]
+        header = s.read(80)
+        (self["version"], self["previousBlockHash"], self["merkleRoot"],
+         self["time"], self["bits"], self["nonce"]) = BLOCK_HEADER.unpack(header)
         self["versionHex"] = pack(">L", self["version"]).hex()
-        self["previousBlockHash"] = s.read(32)
-        self["merkleRoot"] = s.read(32)
-        self["time"] = unpack("<L", s.read(4))[0]
-        self["bits"] = s.read(4)
-
         self["target"] = bits_to_target(unpack("<L", self["bits"])[0])
         self["targetDifficulty"] = target_to_difficulty(self["target"])
         self["target"] = self["target"].to_bytes(32, byteorder="little")
-        self["nonce"] = unpack("<L", s.read(4))[0]
-        s.seek(-80, 1)
-        self["header"] = s.read(80)
-        self["hash"] = sha3_256(self["header"])
+        self["header"] = header
+        self["hash"] = sha3_256(header)
 
         block_target = int.from_bytes(self["hash"], byteorder="little")
         self["difficulty"] = target_to_difficulty(block_target)
         tx_count = var_int_to_int(read_var_int(s))
-        self["tx"] = dict()
+        tx = dict()
+        amount = 0
+        stripped_size = 0
         for i in range(tx_count):
-            self["tx"][i] = Transaction(s, format="raw", keep_raw_tx=keep_raw_tx)
-            self["amount"] += self["tx"][i]["amount"]
-            self["strippedSize"] += self["tx"][i]["bSize"]
-        self["strippedSize"] += var_int_len(tx_count)
+            t = Transaction(s, format="raw", keep_raw_tx=keep_raw_tx)
+            tx[i] = t
+            amount += t["amount"]
+            stripped_size += t["bSize"]
+        self["tx"] = tx
+        self["amount"] = amount
+        self["strippedSize"] += stripped_size + var_int_len(tx_count)
         self["weight"] = self["strippedSize"] * 3 + self["size"]
         if format == "decoded":
             self.decode(testnet=testnet)
@@ -87,21 +92,13 @@ class Block(dict):
         self["format"] = "decoded"
         if testnet is not None:
             self["testnet"] = testnet
-        if isinstance(self["hash"], bytes):
-            self["hash"] = rh2s(self["hash"])
-        if isinstance(self["target"], bytes):
-            self["target"] = rh2s(self["target"])
-        if isinstance(self["previousBlockHash"], bytes):
-            self["previousBlockHash"] = rh2s(self["previousBlockHash"])
-        if "nextBlockHash" in self:
-            if isinstance(self["nextBlockHash"], bytes):
-                self["nextBlockHash"] = rh2s(self["nextBlockHash"])
-        if isinstance(self["merkleRoot"], bytes):
-            self["merkleRoot"] = rh2s(self["merkleRoot"])
+        for k in ("hash", "target", "previousBlockHash",
+                  "nextBlockHash", "merkleRoot", "bits"):
+            v = self.get(k)
+            if isinstance(v, bytes):
+                self[k] = rh2s(v)
         if isinstance(self["header"], bytes):
             self["header"] = self["header"].hex()
-        if isinstance(self["bits"], bytes):
-            self["bits"] = rh2s(self["bits"])
         for i in self["tx"]:
             self["tx"][i].decode(testnet=testnet)
 
@@ -117,6 +114,10 @@ class Block(dict):
         return stream
 
 class BlockTemplate():
+    # template parts independent from extranonce/time/nonce, reused
+    # across template refreshes while tip and mempool are unchanged
+    _template_cache = LRU(16)
+
     def __init__(self, data, coinbase_output_address, testnet = False, coinbase_message = "",
                  extranonce1 = "00000000",
                  extranonce1_size = 4,
@@ -145,33 +146,65 @@ class BlockTemplate():
         self.transactions = list(data["transactions"])
         self.txid_list = list()
         self.scan_tx_list()
-        self.coinbase_tx = self.create_coinbase_transaction()
-        self.coinb1, self.coinb2 = self.split_coinbase()
+        template_key = (data["previousblockhash"],
+                        self.height,
+                        self.coinbasevalue,
+                        self.coinbase_output_address,
+                        self.coinbase_message,
+                        extranonce1_size,
+                        extranonce2_size,
+                        sha256(b"".join(self.txid_list)))
+        cached = BlockTemplate._template_cache.get(template_key)
+        if cached is None:
+            self.coinbase_tx = self.create_coinbase_transaction()
+            self.coinb1, self.coinb2 = self.split_coinbase()
+            self.merkle_branches_b = merkle_branches([self.coinbase_tx["txId"], ] + self.txid_list,
+                                                     hex=False)
+            self.merkle_branches = [h.hex() for h in self.merkle_branches_b]
+            BlockTemplate._template_cache[template_key] = (self.coinbase_tx,
+                                                           self.coinb1,
+                                                           self.coinb2,
+                                                           self.merkle_branches,
+                                                           self.merkle_branches_b)
+        else:
+            self.coinbase_tx, self.coinb1, self.coinb2, \
+                self.merkle_branches, self.merkle_branches_b = cached
+        # canonical bytes representation of the header/coinbase fields,
+        # hex is emitted only at the stratum API border
+        self.version_b = data["version"].to_bytes(4, "little")
+        self.previous_block_hash_b = s2rh_step4(self.previous_block_hash)
+        self.time_b = data["curtime"].to_bytes(4, "little")
+        self.bits_b = s2rh(self.bits)
+        self.coinb1_b = bytes_from_hex(self.coinb1)
+        self.coinb2_b = bytes_from_hex(self.coinb2)
+        # full coinbase with a zeroed extranonce window, spliced in place
+        # on each submitted share instead of reassembled from the halves
+        self.extranonce_size = extranonce1_size + extranonce2_size
+        self.extranonce_offset = len(self.coinb1_b)
+        self.coinbase_b = bytearray(b"".join((self.coinb1_b,
+                                              bytes(self.extranonce_size),
+                                              self.coinb2_b)))
+        self.tx_data = "".join(t["data"] for t in self.transactions)
+        # per-call constants of submit_job, folded once for the fixed
+        # (extranonce1_size, extranonce2_size) pair of this template
+        self.extranonce_hex_size = self.extranonce_size * 2
+        self.extranonce_slice = slice(self.extranonce_offset,
+                                      self.extranonce_offset + self.extranonce_size)
+        self.tx_count_var_int = int_to_var_int(len(self.transactions) + 1).hex()
         self.target = bits_to_target(self.bits)
         self.difficulty = target_to_difficulty(self.target)
-        # print("<>>>>>>",self.coinbase_tx["txId"])
-        self.merkle_branches = [i for i in merkle_branches([self.coinbase_tx["txId"],] + self.txid_list)]
 
 
     def scan_tx_list(self):
-        self.coinbasevalue = self.block_reward
-        self.sigop = 0
-        self.weight = 0
-        self.txid_list = list()
-        tx_fee = 0
-        for tx in self.transactions:
-            txid = s2rh(tx["txid"])
-            tx_fee += tx["fee"]
-            self.weight += tx["weight"]
-            self.sigop += tx["sigops"]
-            self.txid_list.append(txid)
-        self.coinbasevalue  += math.floor(tx_fee / 10)
+        transactions = self.transactions
+        self.sigop = sum(tx["sigops"] for tx in transactions)
+        self.weight = sum(tx["weight"] for tx in transactions)
+        self.txid_list = [bytes_from_hex(tx["txid"])[::-1] for tx in transactions]
+        self.coinbasevalue = self.block_reward + sum(tx["fee"] for tx in transactions) // 10
 
     def calculate_commitment(self, witness_reserved_value):
         wtxid_list = [b"\x00" * 32,]
-        if self.transactions:
-            for tx in self.transactions:
-                wtxid_list.append(s2rh(tx["hash"]))
+        wtxid_list.extend(bytes_from_hex(tx["hash"])[::-1] for tx in self.transactions)
         return double_sha256(merkle_root_double_sha256(wtxid_list, return_hex=0) + witness_reserved_value)
 
     def split_coinbase(self):
@@ -228,40 +261,42 @@ class BlockTemplate():
                 clean_jobs]
 
     def submit_job(self, extra_nonce_1, extra_nonce_2, nonce, time):
-        version = s2rh(self.version)
-        prev_hash = s2rh_step4(self.previous_block_hash)
-        cb = self.coinb1 + extra_nonce_1 + extra_nonce_2 + self.coinb2
-        # print("ccoinbase", cb)
-        time = s2rh(time)
-        bits = s2rh(self.bits)
-        nonce = s2rh(nonce)
-        c = Transaction(cb)
-        cbh =  s2rh(c["txId"])
-        merkle_root = merkle_root_from_branches(self.merkle_branches, cbh)
-        header = version + prev_hash + merkle_root + time + bits + nonce
-        block = header.hex()
-        block +=int_to_var_int(len (self.transactions) + 1).hex()
-        block += cb
-        for t in self.transactions:
-            block += t["data"]
-        return sha3_256(header,1), block
+        extranonce = extra_nonce_1 + extra_nonce_2
+        if len(extranonce) != self.extranonce_hex_size:
+            raise ValueError("extranonce size error")
+        cb = self.coinbase_b
+        cb[self.extranonce_slice] = bytes_from_hex(extranonce)
+        merkle_root = sha256(cb)
+        dsha = __double_sha256__
+        for h in self.merkle_branches_b:
+            merkle_root = dsha(merkle_root + h)
+        header = b"".join((self.version_b,
+                           self.previous_block_hash_b,
+                           merkle_root,
+                           s2rh(time),
+                           self.bits_b,
+                           s2rh(nonce)))
+        block = "".join((header.hex(),
+                         self.tx_count_var_int,
+                         cb.hex(),
+                         self.tx_data))
+        return __sha3_256__(header).hex(), block
+
 
+    def mn_batch(self, nonce_base, count=4):
+        """
+        Hash a run of consecutive nonces for the prepared job in one call.
+
+        :param nonce_base: first nonce as integer.
+        :param count: (optional) number of consecutive nonces, by default is 4.
+        :return: list of header hashes as HEX encoded strings.
+        """
+        h1 = self.h1
+        sha3 = __sha3_256__
+        return [sha3(b"".join((h1, (nonce_base + i).to_bytes(4, "little"), h1))).hex()
+                for i in range(count)]
 
     def mn(self,  nonce):
 
-        header = self.h1 +  s2rh(nonce) + self.h1
-        return sha3_256(header, 1)
-        cb = self.coinb1 + BlockTemplate.extra_nonce_1 + BlockTemplate.extra_nonce_2 + self.coinb2
-        time = s2rh(BlockTemplate.time)
-        bits = s2rh(self.bits)
-        nonce = s2rh(nonce)
-        cbh = sha3_256(bytes_from_hex(cb))
-        c = Transaction(cb)
-        merkle_root = merkle_root_from_branches(self.merkle_branches, cbh)
-        header = Block.version + BlockTemplate.prev_hash + merkle_root + time + bits + nonce
-        block = header.hex()
-        block +=int_to_var_int(len (self.transactions) + 1).hex()
-        block += cb
-        for t in self.transactions:
-            block += t["data"]
-        return sha3_256(header,1), block
+        header = b"".join((self.h1, s2rh(nonce), self.h1))
+        return __sha3_256__(header).hex()
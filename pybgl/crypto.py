@@ -23,6 +23,9 @@ def __encode_base58__(h):
 def __double_sha256__(h):
     return _crypto.__double_sha256__(h)
 
+def __sha256d64__(h):
+    return _crypto.__sha256d64__(h)
+
 def __sha256__(h):
     return _crypto.__sha256__(h)
 
@@ -1,6 +1,7 @@
 from pybgl.functions.tools import s2rh, bytes_from_hex, int_from_bytes, rh2s
-from pybgl.functions.hash import sha3_256, double_sha256, sha256
+from pybgl.functions.hash import sha3_256, double_sha256, double_sha256_d64, sha256
 from collections import deque
+from functools import lru_cache
 from math import ceil, log
 
 def merkle_root(tx_hash_list, return_hex=True, receive_hex=True):
@@ -16,25 +17,15 @@ def merkle_root_double_sha256(tx_hash_list, return_hex=True, receive_hex=True):
     :return: merkle root in bytes or HEX encoded string corresponding hex flag.
     """
     if receive_hex:
-        tx_hash_list = deque([h if isinstance(h, bytes) else s2rh(h) for h in tx_hash_list])
+        tx_hash_list = [h if isinstance(h, bytes) else s2rh(h) for h in tx_hash_list]
     else:
-        tx_hash_list = deque(tx_hash_list)
-    if len(tx_hash_list) == 1:
-        return rh2s(tx_hash_list[0]) if return_hex else tx_hash_list[0]
-    while True:
-        new_hash_list = deque()
-        append = new_hash_list.append
-        while tx_hash_list:
-            h1 = tx_hash_list.popleft()
-            try:
-                h2 = tx_hash_list.popleft()
-            except:
-                h2 = h1
-            append(double_sha256(b"".join((h1, h2))))
-        if len(new_hash_list) > 1:
-            tx_hash_list = new_hash_list
-        else:
-            return new_hash_list[0] if not return_hex else rh2s(new_hash_list[0])
+        tx_hash_list = list(tx_hash_list)
+    while len(tx_hash_list) > 1:
+        if len(tx_hash_list) % 2:
+            tx_hash_list.append(tx_hash_list[-1])
+        d = double_sha256_d64(b"".join(tx_hash_list))
+        tx_hash_list = [d[i:i + 32] for i in range(0, len(d), 32)]
+    return rh2s(tx_hash_list[0]) if return_hex else tx_hash_list[0]
 
 def merkle_root_sha256(tx_hash_list, return_hex=True, receive_hex=True):
     """
@@ -204,20 +195,15 @@ def merkle_branches(tx_hash_list, hex=True):
     tx_hash_list.pop(0)
     while True:
         branches.append(tx_hash_list.pop(0))
-        new_hash_list = list()
-        while tx_hash_list:
-            h1 = tx_hash_list.pop(0)
-            try:
-                h2 = tx_hash_list.pop(0)
-            except:
-                h2 = h1
-            new_hash_list.append(double_sha256(h1 + h2))
-        if len(new_hash_list) > 1:
-            tx_hash_list = new_hash_list
-        else:
-            if new_hash_list:
-                branches.append(new_hash_list.pop(0))
+        if not tx_hash_list:
+            return branches if not hex else [h.hex() for h in branches]
+        if len(tx_hash_list) % 2:
+            tx_hash_list.append(tx_hash_list[-1])
+        d = double_sha256_d64(b"".join(tx_hash_list))
+        if len(d) == 32:
+            branches.append(d)
             return branches if not hex else [h.hex() for h in branches]
+        tx_hash_list = [d[i:i + 32] for i in range(0, len(d), 32)]
 
 
 def merkle_root_from_branches(merkle_branches, coinbase_hash, hex=True):
@@ -238,12 +224,15 @@ def merkle_root_from_branches(merkle_branches, coinbase_hash, hex=True):
 
 
 
+@lru_cache(maxsize=32)
 def bits_to_target(bits):
     """
     Calculate target from bits
 
     :param bits: HEX string, bytes string or integer representation of bits.
     :return: integer.
+
+    Bits change only on difficulty retarget, so results are memoized.
     """
     if type(bits) == str:
         bits = bytes_from_hex(bits)
@@ -1,6 +1,7 @@
 from hashlib import new as hashlib_new
 from hashlib import sha512 as hashlib_sha512
 from pybgl.crypto import __double_sha256__
+from pybgl.crypto import __sha256d64__
 from pybgl.crypto import __sha256__
 from pybgl.crypto import __siphash__
 from pybgl.crypto import __murmurhash3__
@@ -53,6 +54,18 @@ def double_sha256(h, hex=False, encoding=None):
     return __double_sha256__(h).hex() if hex else __double_sha256__(h)
 
 
+def double_sha256_d64(h, hex=False, encoding=None):
+    """
+    Calculate double sha256 for each 64 byte block of byte string
+
+    :param h: byte string with length multiple of 64 or HEX encoded string
+    :return: concatenated 32 byte hashes of blocks, uses batched
+             SSE4.1/AVX2/SHA-NI backend when available.
+    """
+    h = get_bytes(h, encoding=encoding)
+    return __sha256d64__(h).hex() if hex else __sha256d64__(h)
+
+
 def hmac_sha512(key, data, hex=False, encoding=None):
     key = get_bytes(key, encoding=encoding)
     data = get_bytes(data, encoding=encoding)
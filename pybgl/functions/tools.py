@@ -144,13 +144,7 @@ def var_int_len(n):
     :param n: integer.
     :return: integer.
     """
-    if n <= 0xfc:
-        return 1
-    if n <= 0xffff:
-        return 3
-    elif n <= 0xffffffff:
-        return 5
-    return 9
+    return 1 + (n > 0xfc) * 2 + (n > 0xffff) * 2 + (n > 0xffffffff) * 4
 
 
 def get_var_int_len(bytes):
@@ -1,5 +1,6 @@
 import errno
 import os.path
+import platform
 from setuptools import setup, find_packages, Extension
 from setup_tools import *
 from distutils.command.build_clib import build_clib as _build_clib
@@ -122,8 +123,36 @@ class build_ext(_build_ext):
 
         return _build_ext.run(self)
 
+    def build_extensions(self):
+        if SIMD_SHA256_SOURCE_FLAGS:
+            compile = self.compiler._compile
 
+            def _compile(obj, src, ext, cc_args, extra_postargs, pp_opts):
+                flags = SIMD_SHA256_SOURCE_FLAGS.get(os.path.basename(src))
+                if flags:
+                    extra_postargs = extra_postargs + flags
+                return compile(obj, src, ext, cc_args, extra_postargs, pp_opts)
 
+            self.compiler._compile = _compile
+        return _build_ext.build_extensions(self)
+
+
+# Specialized SHA256 implementations are used only after runtime cpuid
+# detection (SHA256AutoDetect), so it is safe to compile them for x86
+# unconditionally. Only these translation units get the SIMD flags.
+if platform.machine() in ("x86_64", "AMD64", "i386", "i686"):
+    SIMD_SHA256_DEFINE_MACROS = [("USE_ASM", None),
+                                 ("ENABLE_SSE41", None),
+                                 ("ENABLE_AVX2", None),
+                                 ("ENABLE_SHANI", None)]
+    SIMD_SHA256_SOURCE_FLAGS = {
+        "sha256_sse41.cpp": ["-msse4.1"],
+        "sha256_avx2.cpp": ["-mavx2"],
+        "sha256_shani.cpp": ["-msse4", "-msha"],
+    }
+else:
+    SIMD_SHA256_DEFINE_MACROS = []
+    SIMD_SHA256_SOURCE_FLAGS = {}
 
 
 
@@ -174,6 +203,7 @@ setup(name='pybgl',
                               "pybgl/_crypto/crypto/utilstrencodings.cpp",
                               ],
                              extra_compile_args=['-std=c++11'],
+                             define_macros=SIMD_SHA256_DEFINE_MACROS,
                              include_dirs=["pybgl/_crypto/crypto"])
                    ],
 